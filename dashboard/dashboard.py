@@ -1,7 +1,13 @@
+import os
+import tempfile
 import streamlit as st
 import pandas as pd
+import polars as pl
 import numpy as np
-import matplotlib.pyplot as plt
+import pyarrow as pa
+import duckdb
+from numba import njit
+from matplotlib.figure import Figure
 import seaborn as sns
 from datetime import datetime, timedelta
 from PIL import Image
@@ -21,32 +27,93 @@ st.set_page_config(
 # ============================================================================
 # LOAD DATA
 # ============================================================================
+DATA_FILES = {
+    'orders': 'data/olist_orders_dataset.csv',
+    'order_items': 'data/olist_order_items_dataset.csv',
+    'products': 'data/olist_products_dataset.csv',
+    'customers': 'data/olist_customers_dataset.csv',
+    'product_cat': 'data/product_category_name_translation.csv'
+}
+# Bump CACHE_VERSION whenever merge_data() changes its output (columns, dtypes, row order)
+# so caches written by older code are never mistaken for fresh ones
+CACHE_VERSION = 7
+MERGED_CACHE = f'data/_merged_v{CACHE_VERSION}.parquet'
+CATEGORY_COLS = ['customer_id', 'order_id', 'product_id', 'customer_state', 'product_category_name_english']
+USED_COLS = ['order_id', 'customer_id', 'product_id', 'product_category_name_english', 'customer_state',
+             'order_purchase_timestamp', 'price', 'freight_value', 'revenue']
+
+def is_cache_fresh():
+    """Check that the Parquet cache exists and is newer than every source CSV"""
+    if not os.path.exists(MERGED_CACHE):
+        return False
+    cache_mtime = os.path.getmtime(MERGED_CACHE)
+    return all(os.path.getmtime(path) <= cache_mtime for path in DATA_FILES.values())
+
+def merge_data():
+    """Scan and join the source CSVs into a single pandas frame"""
+    # Scan raw data lazily
+    orders = pl.scan_csv(DATA_FILES['orders'])
+    order_items = pl.scan_csv(DATA_FILES['order_items'])
+    products = pl.scan_csv(DATA_FILES['products'])
+    customers = pl.scan_csv(DATA_FILES['customers'])
+    product_cat = pl.scan_csv(DATA_FILES['product_cat'])
+    
+    # Merge datasets, parse datetime, calculate revenue and clean category names in one plan;
+    # selecting only the columns the dashboard uses lets Polars skip parsing the rest
+    merged_df = orders.join(order_items, on='order_id') \
+        .join(products, on='product_id') \
+        .join(customers, on='customer_id') \
+        .join(product_cat, on='product_category_name', how='left') \
+        .with_columns([
+            pl.col('order_purchase_timestamp').str.to_datetime(),
+            (pl.col('price') + pl.col('freight_value')).alias('revenue'),
+            pl.col('product_category_name_english').fill_null('Unknown')
+        ]) \
+        .with_columns(pl.col('price', 'freight_value').cast(pl.Float32)) \
+        .select(USED_COLS) \
+        .collect(engine='streaming') \
+        .to_pandas()
+    
+    # Months since epoch as int64 (cheaper to group on than Period objects)
+    merged_df['order_month_i'] = merged_df['order_purchase_timestamp'].values.astype('datetime64[M]').view('int64')
+    
+    # Sort by timestamp so date filters can use binary search
+    merged_df = merged_df.sort_values('order_purchase_timestamp', kind='stable').reset_index(drop=True)
+    
+    # Dictionary-encode repeated strings (also kept as dictionary columns in Parquet)
+    for col in CATEGORY_COLS:
+        merged_df[col] = merged_df[col].astype('category')
+    
+    return merged_df
+
+def write_cache(merged_df):
+    """Atomically write the Parquet cache (skipped on read-only filesystems)"""
+    # Write to a temp file next to the cache and swap it in, so a killed process or a
+    # concurrent writer can never leave a truncated cache behind
+    tmp_path = None
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(MERGED_CACHE), prefix='_merged_', suffix='.tmp')
+        os.close(fd)
+        merged_df.to_parquet(tmp_path, engine='pyarrow', compression='zstd', row_group_size=200_000)
+        os.chmod(tmp_path, 0o644)  # mkstemp creates files private to the owner
+        os.replace(tmp_path, MERGED_CACHE)
+    except OSError:
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
 @st.cache_data
 def load_data():
-    """Load all required datasets"""
+    """Load all required datasets, reusing the on-disk Parquet cache when fresh"""
     try:
-        # Load raw data
-        orders = pd.read_csv('data/olist_orders_dataset.csv')
-        order_items = pd.read_csv('data/olist_order_items_dataset.csv')
-        products = pd.read_csv('data/olist_products_dataset.csv')
-        customers = pd.read_csv('data/olist_customers_dataset.csv')
-        product_cat = pd.read_csv('data/product_category_name_translation.csv')
-        
-        # Merge datasets
-        merged_df = orders.merge(order_items, on='order_id') \
-            .merge(products, on='product_id') \
-            .merge(customers, on='customer_id') \
-            .merge(product_cat, on='product_category_name', how='left')
-        
-        # Parse datetime
-        merged_df['order_purchase_timestamp'] = pd.to_datetime(merged_df['order_purchase_timestamp'])
-        merged_df['order_month'] = merged_df['order_purchase_timestamp'].dt.to_period('M')
-        
-        # Calculate revenue
-        merged_df['revenue'] = merged_df['price'] + merged_df['freight_value']
+        if is_cache_fresh():
+            try:
+                return pd.read_parquet(MERGED_CACHE)
+            except (OSError, ValueError):
+                # Corrupt or truncated cache: fall through and rebuild it
+                pass
         
-        # Clean category names
-        merged_df['product_category_name_english'] = merged_df['product_category_name_english'].fillna('Unknown')
+        merged_df = merge_data()
+        write_cache(merged_df)
         
         return merged_df
     
@@ -57,40 +124,88 @@ def load_data():
 # ============================================================================
 # CALCULATE RFM METRICS
 # ============================================================================
+SEGMENTS = ['At Risk', 'Champions', 'Loyal', 'Potential']
+
+def rank_positions(a):
+    """Zero-based rank of each value (ties broken by order, like rank(method='first'))"""
+    order = np.argsort(a, kind='stable')
+    ranks = np.empty_like(order)
+    ranks[order] = np.arange(len(a))
+    return ranks
+
+@njit(cache=True)
+def quartile_bin(rank, step):
+    """0-3 bin of a zero-based rank, matching pd.qcut(rank + 1, 4) (right-closed edges at k * step)"""
+    return (rank > step) + (rank > 2 * step) + (rank > 3 * step)
+
+@njit(cache=True)
+def rfm_kernel(r_rank, f_rank, m_rank, r_score, f_score, m_score, seg_codes):
+    """Fill quartile scores and segment codes (indices into SEGMENTS) in one pass"""
+    n = len(r_rank)
+    step = (n - 1) / 4.0
+    for i in range(n):
+        R = 4 - quartile_bin(r_rank[i], step)
+        F = quartile_bin(f_rank[i], step) + 1
+        M = quartile_bin(m_rank[i], step) + 1
+        r_score[i] = R
+        f_score[i] = F
+        m_score[i] = M
+        if R >= 3 and F >= 3 and M >= 3:
+            seg_codes[i] = 1  # Champions
+        elif R >= 3 and F >= 2:
+            seg_codes[i] = 2  # Loyal
+        elif R <= 2 and M >= 3:
+            seg_codes[i] = 0  # At Risk
+        else:
+            seg_codes[i] = 3  # Potential
+
 @st.cache_data
 def calculate_rfm(merged_df):
     """Calculate RFM segments"""
-    snapshot_date = merged_df['order_purchase_timestamp'].max() + timedelta(days=1)
+    # Customer and order codes are dense 0..n-1 integers thanks to the category dtype
+    customer_codes = merged_df['customer_id'].cat.codes.values.astype(np.int64)
+    order_codes = merged_df['order_id'].cat.codes.values.astype(np.int64)
+    n_customers = len(merged_df['customer_id'].cat.categories)
+    n_orders = len(merged_df['order_id'].cat.categories)
     
-    rfm = merged_df.groupby('customer_id').agg({
-        'order_purchase_timestamp': lambda x: (snapshot_date - x.max()).days,
-        'order_id': 'nunique',
-        'revenue': 'sum'
-    }).reset_index()
+    # Recency: whole days between the last purchase and the day after the latest order
+    ts = merged_df['order_purchase_timestamp'].values.astype('datetime64[s]').view('int64')
+    snapshot = ts.max() + 86400
+    last_ts = np.full(n_customers, np.iinfo(np.int64).min)
+    np.maximum.at(last_ts, customer_codes, ts)
+    recency = (snapshot - last_ts) // 86400
     
-    rfm.columns = ['customer_id', 'Recency', 'Frequency', 'Monetary']
+    # Frequency: distinct (customer, order) pairs per customer
+    pairs = np.unique(customer_codes * n_orders + order_codes)
+    frequency = np.bincount(pairs // n_orders, minlength=n_customers)
     
-    # Calculate RFM scores
-    rfm['R_score'] = pd.qcut(rfm['Recency'].rank(method='first'), 4, labels=[4, 3, 2, 1], duplicates='drop')
-    rfm['F_score'] = pd.qcut(rfm['Frequency'].rank(method='first'), 4, labels=[1, 2, 3, 4], duplicates='drop')
-    rfm['M_score'] = pd.qcut(rfm['Monetary'].rank(method='first'), 4, labels=[1, 2, 3, 4], duplicates='drop')
+    # Monetary: total revenue per customer
+    monetary = np.bincount(customer_codes, weights=merged_df['revenue'].values, minlength=n_customers)
     
-    rfm['R_score'] = rfm['R_score'].astype(int)
-    rfm['F_score'] = rfm['F_score'].astype(int)
-    rfm['M_score'] = rfm['M_score'].astype(int)
+    rfm = pd.DataFrame({
+        'customer_id': merged_df['customer_id'].cat.categories,
+        'Recency': recency.astype(np.int32),
+        'Frequency': frequency.astype(np.int16),
+        'Monetary': monetary.astype(np.float32)
+    })
     
-    # Define segments
-    def segment_customer(row):
-        if row['R_score'] >= 3 and row['F_score'] >= 3 and row['M_score'] >= 3:
-            return 'Champions'
-        elif row['R_score'] >= 3 and row['F_score'] >= 2:
-            return 'Loyal'
-        elif row['R_score'] <= 2 and row['M_score'] >= 3:
-            return 'At Risk'
-        else:
-            return 'Potential'
+    # Calculate RFM scores and segments
+    n = len(rfm)
+    r_score = np.empty(n, dtype=np.int8)
+    f_score = np.empty(n, dtype=np.int8)
+    m_score = np.empty(n, dtype=np.int8)
+    seg_codes = np.empty(n, dtype=np.int8)
+    rfm_kernel(
+        rank_positions(rfm['Recency'].values),
+        rank_positions(rfm['Frequency'].values),
+        rank_positions(monetary),  # rank on float64 sums; float32 rounding would reorder near-ties
+        r_score, f_score, m_score, seg_codes
+    )
     
-    rfm['segment'] = rfm.apply(segment_customer, axis=1)
+    rfm['R_score'] = r_score
+    rfm['F_score'] = f_score
+    rfm['M_score'] = m_score
+    rfm['segment'] = pd.Categorical.from_codes(seg_codes, categories=SEGMENTS)
     return rfm
 
 # ============================================================================
@@ -103,7 +218,13 @@ if merged_df is None:
     st.stop()
 
 rfm = calculate_rfm(merged_df)
-merged_df = merged_df.merge(rfm[['customer_id', 'segment']], on='customer_id', how='left')
+
+# Attach segments by indexing a per-customer lookup with the customer_id codes
+segment_lookup = rfm.set_index('customer_id')['segment'].reindex(merged_df['customer_id'].cat.categories)
+merged_df['segment'] = pd.Categorical.from_codes(
+    segment_lookup.cat.codes.values[merged_df['customer_id'].cat.codes.values],
+    categories=segment_lookup.cat.categories
+)
 
 # ============================================================================
 # CUSTOM STYLING
@@ -178,9 +299,21 @@ else:
     start_date = min_date
     end_date = max_date
 
+@st.cache_data
+def get_filter_options(_df):
+    """Sorted option lists for the category, state and segment filters"""
+    # Category dtype already holds the distinct values, so no column scan is needed
+    return (
+        sorted(_df['product_category_name_english'].cat.categories.tolist()),
+        sorted(_df['customer_state'].cat.categories.tolist()),
+        sorted(_df['segment'].cat.categories.tolist())
+    )
+
+category_options, state_options, segment_options = get_filter_options(merged_df)
+
 # FILTER 2: Product Category
 st.sidebar.markdown("### 🏷️ Filter 2: Kategori Produk")
-categories = ['Semua Kategori'] + sorted(merged_df['product_category_name_english'].unique().tolist())
+categories = ['Semua Kategori'] + category_options
 selected_categories = st.sidebar.multiselect(
     "Pilih kategori produk:",
     options=categories,
@@ -190,7 +323,7 @@ selected_categories = st.sidebar.multiselect(
 
 # FILTER 3: Geographic (State)
 st.sidebar.markdown("### 🌍 Filter 3: Wilayah Geografis")
-states = ['Semua Wilayah'] + sorted(merged_df['customer_state'].unique().tolist())
+states = ['Semua Wilayah'] + state_options
 selected_states = st.sidebar.multiselect(
     "Pilih wilayah (state):",
     options=states,
@@ -200,7 +333,7 @@ selected_states = st.sidebar.multiselect(
 
 # FILTER 4: Customer Segment (RFM)
 st.sidebar.markdown("### 👥 Filter 4: Segmen Pelanggan (RFM)")
-segments = ['Semua Segmen'] + sorted(merged_df['segment'].unique().tolist())
+segments = ['Semua Segmen'] + segment_options
 selected_segments = st.sidebar.multiselect(
     "Pilih segmen pelanggan:",
     options=segments,
@@ -214,24 +347,85 @@ st.sidebar.info("ℹ️ Semua filter di atas mempengaruhi visualisasi dashboard
 # ============================================================================
 # APPLY FILTERS TO DATA
 # ============================================================================
-# Create filter logic
-filtered_df = merged_df.copy()
-
-# Date filter
-filtered_df = filtered_df[(filtered_df['order_purchase_timestamp'] >= start_date) & 
-                          (filtered_df['order_purchase_timestamp'] < end_date)]
-
-# Category filter
-if 'Semua Kategori' not in selected_categories:
-    filtered_df = filtered_df[filtered_df['product_category_name_english'].isin(selected_categories)]
-
-# State filter
-if 'Semua Wilayah' not in selected_states:
-    filtered_df = filtered_df[filtered_df['customer_state'].isin(selected_states)]
-
-# Segment filter
-if 'Semua Segmen' not in selected_segments:
-    filtered_df = filtered_df[filtered_df['segment'].isin(selected_segments)]
+def isin_codes(col, values):
+    """Boolean mask of rows whose category is in values, compared on integer codes"""
+    codes = col.cat.categories.get_indexer(values)
+    return np.isin(col.cat.codes.values, codes[codes >= 0])
+
+@st.cache_resource
+def get_connection():
+    """Shared in-memory DuckDB connection"""
+    return duckdb.connect()
+
+@st.cache_data(max_entries=32)
+def get_filtered(start, end, categories, states, segments):
+    """Filter and aggregate data for the given filter tuple"""
+    # merged_df is read as a module global so Streamlit never hashes the full frame
+    
+    # Date filter: merged_df is sorted by timestamp, so binary search gives a contiguous slice
+    ts = merged_df['order_purchase_timestamp'].values
+    lo, hi = np.searchsorted(ts, [start.to_datetime64(), end.to_datetime64()])
+    base = merged_df.iloc[lo:hi]
+    
+    # Combine the remaining filters into one mask over category codes, then slice once
+    mask = np.ones(len(base), dtype=bool)
+    
+    # Category filter
+    if 'Semua Kategori' not in categories:
+        mask &= isin_codes(base['product_category_name_english'], categories)
+    
+    # State filter
+    if 'Semua Wilayah' not in states:
+        mask &= isin_codes(base['customer_state'], states)
+    
+    # Segment filter
+    if 'Semua Segmen' not in segments:
+        mask &= isin_codes(base['segment'], segments)
+    
+    # Only materialize a copy when a filter actually drops rows; otherwise keep the slice
+    filtered_df = base if mask.all() else base[mask]
+    
+    # Aggregate the filtered rows in DuckDB; registrations are cursor-local, so each call
+    # registers its own Arrow view of filtered_df and the filters live only in the mask above
+    agg_cols = ['order_month_i', 'order_id', 'customer_id', 'product_category_name_english',
+                'customer_state', 'segment', 'revenue']
+    with get_connection().cursor() as cur:
+        cur.register('m', pa.Table.from_pandas(filtered_df[agg_cols], preserve_index=False))
+        monthly = cur.execute("""
+            SELECT order_month_i AS month, count(DISTINCT order_id) AS transaction_count, sum(revenue) AS revenue
+            FROM m GROUP BY 1 ORDER BY 1
+        """).df()
+        by_cat = cur.execute("""
+            SELECT product_category_name_english, count(DISTINCT order_id) AS orders, sum(revenue) AS revenue
+            FROM m GROUP BY 1 ORDER BY revenue DESC LIMIT 10
+        """).df()
+        by_state = cur.execute("""
+            SELECT customer_state, count(DISTINCT customer_id) AS customers, sum(revenue) AS revenue
+            FROM m GROUP BY 1 ORDER BY revenue DESC LIMIT 15
+        """).df()
+        by_seg = cur.execute("""
+            SELECT segment::VARCHAR AS segment, count(DISTINCT customer_id) AS customers, sum(revenue) AS revenue
+            FROM m GROUP BY 1 ORDER BY 1
+        """).df()
+    
+    # Preview rows as an Arrow table so st.dataframe can skip the pandas conversion
+    display_cols = ['order_id', 'customer_id', 'product_category_name_english', 
+                    'customer_state', 'segment', 'revenue', 'order_purchase_timestamp']
+    # Decode category columns first, otherwise Arrow ships each column's full dictionary
+    preview_df = filtered_df[display_cols].head(100)
+    category_cols = [col for col in display_cols if isinstance(preview_df[col].dtype, pd.CategoricalDtype)]
+    preview_df = preview_df.astype({col: str for col in category_cols})
+    preview = pa.Table.from_pandas(preview_df, preserve_index=False)
+    
+    return filtered_df, by_cat, by_state, by_seg, monthly, preview
+
+filtered_df, by_cat, by_state, by_seg, monthly, preview = get_filtered(
+    start_date,
+    end_date,
+    tuple(sorted(selected_categories)),
+    tuple(sorted(selected_states)),
+    tuple(sorted(selected_segments))
+)
 
 # ============================================================================
 # DISPLAY FILTER STATUS & KPI CARDS
@@ -270,6 +464,19 @@ with col4:
 
 st.markdown("---")
 
+# ============================================================================
+# REUSABLE FIGURES
+# ============================================================================
+def get_figs():
+    """Return this session's chart figures, creating them on the first run"""
+    if 'figs' not in st.session_state:
+        sizes = [(10, 5), (10, 5), (10, 6), (10, 6), (10, 6), (10, 6), (10, 8), (10, 8)]
+        figs = [Figure(figsize=size) for size in sizes]
+        st.session_state['figs'] = [(fig, fig.subplots()) for fig in figs]
+    return st.session_state['figs']
+
+FIGS = get_figs()
+
 # ============================================================================
 # VISUALIZATION 1: MONTHLY TREND (AFFECTED BY FILTERS)
 # ============================================================================
@@ -278,14 +485,11 @@ st.markdown("<div class='subheader'>📈 Tren Bulanan Transaksi & Revenue</div>"
 col1, col2 = st.columns(2)
 
 with col1:
-    monthly_data = filtered_df.groupby(filtered_df['order_purchase_timestamp'].dt.to_period('M')).agg({
-        'order_id': 'nunique',
-        'revenue': 'sum'
-    }).reset_index()
-    monthly_data.columns = ['month', 'transaction_count', 'revenue']
-    monthly_data['month'] = monthly_data['month'].astype(str)
+    monthly_data = monthly
+    monthly_data['month'] = monthly_data['month'].values.astype('datetime64[M]').astype(str)
     
-    fig1, ax1 = plt.subplots(figsize=(10, 5))
+    fig1, ax1 = FIGS[0]
+    ax1.clear()
     ax1.bar(range(len(monthly_data)), monthly_data['transaction_count'], color='#06A77D', alpha=0.8, edgecolor='black')
     ax1.set_xticks(range(len(monthly_data)))
     ax1.set_xticklabels(monthly_data['month'], rotation=45)
@@ -294,11 +498,12 @@ with col1:
     ax1.set_ylabel('Jumlah Transaksi', fontsize=11)
     ax1.set_xlabel('Bulan', fontsize=11)
     ax1.grid(True, alpha=0.2, axis='y')
-    plt.tight_layout()
-    st.pyplot(fig1)
+    fig1.tight_layout()
+    st.pyplot(fig1, clear_figure=False)
 
 with col2:
-    fig2, ax2 = plt.subplots(figsize=(10, 5))
+    fig2, ax2 = FIGS[1]
+    ax2.clear()
     ax2.bar(range(len(monthly_data)), monthly_data['revenue']/1e9, color='#D62828', alpha=0.8, edgecolor='black')
     ax2.set_xticks(range(len(monthly_data)))
     ax2.set_xticklabels(monthly_data['month'], rotation=45)
@@ -307,8 +512,8 @@ with col2:
     ax2.set_ylabel('Revenue (Rp Miliar)', fontsize=11)
     ax2.set_xlabel('Bulan', fontsize=11)
     ax2.grid(True, alpha=0.2, axis='y')
-    plt.tight_layout()
-    st.pyplot(fig2)
+    fig2.tight_layout()
+    st.pyplot(fig2, clear_figure=False)
 
 st.info("✨ **Fitur Interaktif**: Ubah filter di sidebar untuk melihat perubahan grafik tren bulanan secara real-time")
 
@@ -317,28 +522,27 @@ st.info("✨ **Fitur Interaktif**: Ubah filter di sidebar untuk melihat perubaha
 # ============================================================================
 st.markdown("<div class='subheader'>🏆 Top 10 Kategori Produk</div>", unsafe_allow_html=True)
 
-category_data = filtered_df.groupby('product_category_name_english').agg({
-    'order_id': 'nunique',
-    'revenue': 'sum'
-}).reset_index().sort_values('revenue', ascending=False).head(10)
+category_data = by_cat
 
 col1, col2 = st.columns(2)
 
 with col1:
-    fig3, ax3 = plt.subplots(figsize=(10, 6))
-    ax3.barh(range(len(category_data)), category_data['order_id'], color='#06A77D', alpha=0.8, edgecolor='black')
+    fig3, ax3 = FIGS[2]
+    ax3.clear()
+    ax3.barh(range(len(category_data)), category_data['orders'], color='#06A77D', alpha=0.8, edgecolor='black')
     ax3.set_yticks(range(len(category_data)))
     ax3.set_yticklabels(category_data['product_category_name_english'], fontsize=10)
-    ax3.set_title(f"Top 10 Kategori by Volume\nTotal: {category_data['order_id'].sum():,} orders", 
+    ax3.set_title(f"Top 10 Kategori by Volume\nTotal: {category_data['orders'].sum():,} orders", 
                   fontsize=12, fontweight='bold')
     ax3.set_xlabel('Jumlah Order', fontsize=11)
     ax3.invert_yaxis()
     ax3.grid(True, alpha=0.2, axis='x')
-    plt.tight_layout()
-    st.pyplot(fig3)
+    fig3.tight_layout()
+    st.pyplot(fig3, clear_figure=False)
 
 with col2:
-    fig4, ax4 = plt.subplots(figsize=(10, 6))
+    fig4, ax4 = FIGS[3]
+    ax4.clear()
     ax4.barh(range(len(category_data)), category_data['revenue']/1e9, color='#D62828', alpha=0.8, edgecolor='black')
     ax4.set_yticks(range(len(category_data)))
     ax4.set_yticklabels(category_data['product_category_name_english'], fontsize=10)
@@ -347,8 +551,8 @@ with col2:
     ax4.set_xlabel('Revenue (Rp Miliar)', fontsize=11)
     ax4.invert_yaxis()
     ax4.grid(True, alpha=0.2, axis='x')
-    plt.tight_layout()
-    st.pyplot(fig4)
+    fig4.tight_layout()
+    st.pyplot(fig4, clear_figure=False)
 
 st.info("✨ **Fitur Interaktif**: Filter kategori/tanggal akan mengupdate grafik kategori produk")
 
@@ -357,10 +561,7 @@ st.info("✨ **Fitur Interaktif**: Filter kategori/tanggal akan mengupdate grafi
 # ============================================================================
 st.markdown("<div class='subheader'>👥 Distribusi Segmen Pelanggan (RFM)</div>", unsafe_allow_html=True)
 
-segment_data = filtered_df.groupby('segment').agg({
-    'customer_id': 'nunique',
-    'revenue': 'sum'
-}).reset_index()
+segment_data = by_seg
 
 col1, col2 = st.columns(2)
 
@@ -373,28 +574,30 @@ with col1:
     }
     colors = [segment_colors.get(seg, '#999999') for seg in segment_data['segment']]
     
-    fig5, ax5 = plt.subplots(figsize=(10, 6))
-    wedges, texts, autotexts = ax5.pie(segment_data['customer_id'], labels=segment_data['segment'], 
+    fig5, ax5 = FIGS[4]
+    ax5.clear()
+    wedges, texts, autotexts = ax5.pie(segment_data['customers'], labels=segment_data['segment'], 
                                          autopct='%1.1f%%', colors=colors, startangle=90)
     for autotext in autotexts:
         autotext.set_color('white')
         autotext.set_fontweight('bold')
         autotext.set_fontsize(11)
-    ax5.set_title(f"Distribusi Pelanggan by Segment\nTotal: {segment_data['customer_id'].sum():,} pelanggan", 
+    ax5.set_title(f"Distribusi Pelanggan by Segment\nTotal: {segment_data['customers'].sum():,} pelanggan", 
                   fontsize=12, fontweight='bold')
-    plt.tight_layout()
-    st.pyplot(fig5)
+    fig5.tight_layout()
+    st.pyplot(fig5, clear_figure=False)
 
 with col2:
-    fig6, ax6 = plt.subplots(figsize=(10, 6))
+    fig6, ax6 = FIGS[5]
+    ax6.clear()
     ax6.bar(segment_data['segment'], segment_data['revenue']/1e9, color=colors, alpha=0.8, edgecolor='black')
     ax6.set_title(f"Revenue Contribution by Segment\nTotal: Rp {segment_data['revenue'].sum()/1e9:.2f}B", 
                   fontsize=12, fontweight='bold')
     ax6.set_ylabel('Revenue (Rp Miliar)', fontsize=11)
     ax6.tick_params(axis='x', rotation=45)
     ax6.grid(True, alpha=0.2, axis='y')
-    plt.tight_layout()
-    st.pyplot(fig6)
+    fig6.tight_layout()
+    st.pyplot(fig6, clear_figure=False)
 
 st.info("✨ **Fitur Interaktif**: Filter segmen pelanggan akan mengupdate pie chart dan bar chart revenue")
 
@@ -403,15 +606,13 @@ st.info("✨ **Fitur Interaktif**: Filter segmen pelanggan akan mengupdate pie c
 # ============================================================================
 st.markdown("<div class='subheader'>🌍 Distribusi Geografis (Top 15 States)</div>", unsafe_allow_html=True)
 
-geo_data = filtered_df.groupby('customer_state').agg({
-    'customer_id': 'nunique',
-    'revenue': 'sum'
-}).reset_index().sort_values('revenue', ascending=False).head(15)
+geo_data = by_state
 
 col1, col2 = st.columns(2)
 
 with col1:
-    fig7, ax7 = plt.subplots(figsize=(10, 8))
+    fig7, ax7 = FIGS[6]
+    ax7.clear()
     ax7.barh(range(len(geo_data)), geo_data['revenue']/1e9, color='#D62828', alpha=0.8, edgecolor='black')
     ax7.set_yticks(range(len(geo_data)))
     ax7.set_yticklabels(geo_data['customer_state'], fontsize=10)
@@ -420,12 +621,13 @@ with col1:
     ax7.set_xlabel('Revenue (Rp Miliar)', fontsize=11)
     ax7.invert_yaxis()
     ax7.grid(True, alpha=0.2, axis='x')
-    plt.tight_layout()
-    st.pyplot(fig7)
+    fig7.tight_layout()
+    st.pyplot(fig7, clear_figure=False)
 
 with col2:
-    fig8, ax8 = plt.subplots(figsize=(10, 8))
-    revenue_per_cust = geo_data['revenue'] / geo_data['customer_id']
+    fig8, ax8 = FIGS[7]
+    ax8.clear()
+    revenue_per_cust = geo_data['revenue'] / geo_data['customers']
     avg_efficiency = revenue_per_cust.mean()
     colors_geo = ['#FFD700' if x > avg_efficiency * 1.1 else '#FFA07A' for x in revenue_per_cust]
     
@@ -438,8 +640,8 @@ with col2:
     ax8.invert_yaxis()
     ax8.axvline(x=avg_efficiency/1000, color='red', linestyle='--', alpha=0.5, linewidth=2)
     ax8.grid(True, alpha=0.2, axis='x')
-    plt.tight_layout()
-    st.pyplot(fig8)
+    fig8.tight_layout()
+    st.pyplot(fig8, clear_figure=False)
 
 st.info("✨ **Fitur Interaktif**: Filter wilayah akan mengupdate grafik geografis secara real-time")
 
@@ -449,10 +651,7 @@ st.info("✨ **Fitur Interaktif**: Filter wilayah akan mengupdate grafik geograf
 st.markdown("<div class='subheader'>📋 Data Terfilter (Preview)</div>", unsafe_allow_html=True)
 
 with st.expander("Klik untuk melihat data terfilter"):
-    display_cols = ['order_id', 'customer_id', 'product_category_name_english', 
-                    'customer_state', 'segment', 'revenue', 'order_purchase_timestamp']
-    display_df = filtered_df[display_cols].head(100)
-    st.dataframe(display_df, use_container_width=True, height=400)
+    st.dataframe(preview, use_container_width=True, height=400)
 
 # ============================================================================
 # SUMMARY STATISTICS